@@ -1,15 +1,26 @@
+import bisect
+import calendar
+import functools
 import re
+import sys
 import unicodedata
 from datetime import datetime, date
-from typing import Pattern, Tuple, Optional
+from typing import TYPE_CHECKING, Callable, List, Match, Pattern, Tuple, Optional
 from enum import Enum
 
-from dateutil import parser
-import jnc
+if TYPE_CHECKING:
+    import numpy as np
 
 
 __version__ = "1.1.0"
 
+if sys.version_info >= (3, 7):
+    _isascii = str.isascii
+else:
+
+    def _isascii(s: str) -> bool:
+        return not s or max(s) < "\x80"
+
 
 class JPTimeError(Exception):
     """Base class for all jptime exceptions."""
@@ -24,12 +35,16 @@ class ValidationError(JPTimeError):
 
 
 class JPEra:
+    __slots__ = ("name", "code", "symbol_pattern", "begin", "end", "begin_year", "end_tuple")
+
     def __init__(self, name: str, code: int, symbol_pattern: Pattern, begin: datetime, end: datetime) -> None:
         self.name = name
         self.code = code
         self.symbol_pattern = symbol_pattern
         self.begin = begin
         self.end = end
+        self.begin_year = begin.year
+        self.end_tuple = (end.year, end.month, end.day)
 
 
 class JPEraEnum(Enum):
@@ -41,7 +56,7 @@ class JPEraEnum(Enum):
 
     @classmethod
     def code2era(cls, code: int) -> JPEra:
-        return list(JPEraEnum)[code - 1].value
+        return _ALL_ERAS[code - 1]
 
     @classmethod
     def parse(cls, s: str) -> Optional[Tuple[JPEra, str]]:
@@ -52,26 +67,106 @@ class JPEraEnum(Enum):
             # >>> assert parsed[0].code == 1
             # >>> assert parsed[1] "３年３月２３日")
         """
-        for era_enum in cls:
-            era = era_enum.value
-            match = era.symbol_pattern.match(s)
-            if match:
-                return (era, s[match.end() :])
+        # era symbols are 1 or 2 characters long, so look the prefix up directly
+        for length in (2, 1):
+            code = _ERA_PREFIX_MAP.get(s[:length])
+            if code is not None:
+                return (cls.code2era(code), s[length:])
+        return None
+
+
+_ALL_ERAS = tuple(e.value for e in JPEraEnum)
+# the literal symbols of each era's symbol_pattern, looked up without the regex engine
+_ERA_PREFIX_MAP = {
+    **dict.fromkeys(("明治", "M", "\u337e"), 1),
+    **dict.fromkeys(("大正", "T", "\u337d"), 2),
+    **dict.fromkeys(("昭和", "S", "\u337c"), 3),
+    **dict.fromkeys(("平成", "H", "\u337b"), 4),
+    **dict.fromkeys(("令和", "R", "\u32ff"), 5),
+}
+_ERA_FIRST_CHARS = frozenset(symbol[0] for symbol in _ERA_PREFIX_MAP)
+
+# eras are ordered and contiguous, so the era of a date can be found by bisecting
+# over the begin dates encoded as yyyymmdd integers
+_ERA_INT_KEYS = tuple(era.begin.year * 10000 + era.begin.month * 100 + era.begin.day for era in _ALL_ERAS)
+_ERA_START_YEARS = tuple(era.begin_year for era in _ALL_ERAS)
+_ERA_END_TUPLES = tuple(era.end_tuple for era in _ALL_ERAS)
+_ERA_END_KEY = _ERA_END_TUPLES[-1][0] * 10000 + _ERA_END_TUPLES[-1][1] * 100 + _ERA_END_TUPLES[-1][2]
+
+
+_DAYS_IN_MONTH = (31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31)
+
+
+def _is_valid_date(year: int, month: int, day: int) -> bool:
+    """check that (year, month, day) exists without constructing a date"""
+    if year < 1 or not 1 <= month <= 12 or day < 1:
+        return False
+    if month == 2 and calendar.isleap(year):
+        return day <= 29
+    return day <= _DAYS_IN_MONTH[month - 1]
+
+
+def _is_valid(era_code: int, jp_year: int, month: int, day: int) -> bool:
+    """check that the japanese date exists and is within its era"""
+    if era_code <= 0 or era_code > len(_ALL_ERAS):
+        return False
+    christian_year = jp_year + _ERA_START_YEARS[era_code - 1] - 1
+    return (christian_year, month, day) <= _ERA_END_TUPLES[era_code - 1] and _is_valid_date(christian_year, month, day)
+
+
+def _try_jptime(era_code: int, jp_year: int, month: int, day: int) -> Optional["JPTime"]:
+    """JPTime constructor returning None instead of raising ValidationError"""
+    if not _is_valid(era_code, jp_year, month, day):
+        return None
+    return JPTime._unchecked(era_code, jp_year, month, day)
 
 
 class JPTime:
+    """japanese date, immutable once constructed
+
+    to_tuple and __hash__ are cached and from_str shares instances between callers,
+    so attributes cannot be reassigned.
+    """
+
+    __slots__ = ("era_code", "jp_year", "month", "day", "jp_era", "_tuple", "_hash")
+
+    era_code: int
+    jp_year: int
+    month: int
+    day: int
+    jp_era: JPEra
+    _tuple: Tuple[int, int, int, int]
+    _hash: Optional[int]
+
     def __init__(self, era_code: int, jp_year: int, month: int, day: int) -> None:
-        if era_code <= 0 or era_code > len(JPEraEnum):
-            raise ValidationError(f"{era_code} is out of range.")
-        self.era_code = era_code
-        self.jp_year = jp_year
-        self.month = month
-        self.day = day
-        try:
-            self.jp_era = JPEraEnum.code2era(era_code)
-            assert self.to_datetime() <= self.jp_era.end
-        except (IndexError, AssertionError):
-            raise ValidationError(f"{self} is invalid.")
+        if not _is_valid(era_code, jp_year, month, day):
+            if era_code <= 0 or era_code > len(_ALL_ERAS):
+                raise ValidationError(f"{era_code} is out of range.")
+            raise ValidationError(f"JPTime{(era_code, jp_year, month, day)} is invalid.")
+        self._set(era_code, jp_year, month, day)
+
+    @classmethod
+    def _unchecked(cls, era_code: int, jp_year: int, month: int, day: int) -> "JPTime":
+        """construct from values already checked by _is_valid"""
+        jpt = object.__new__(cls)
+        jpt._set(era_code, jp_year, month, day)
+        return jpt
+
+    def _set(self, era_code: int, jp_year: int, month: int, day: int) -> None:
+        setattr_ = object.__setattr__
+        setattr_(self, "era_code", era_code)
+        setattr_(self, "jp_year", jp_year)
+        setattr_(self, "month", month)
+        setattr_(self, "day", day)
+        setattr_(self, "jp_era", JPEraEnum.code2era(era_code))
+        setattr_(self, "_tuple", (era_code, jp_year, month, day))
+        setattr_(self, "_hash", None)
+
+    def __setattr__(self, name: str, value: object) -> None:
+        raise AttributeError(f"{type(self).__name__} is immutable.")
+
+    def __delattr__(self, name: str) -> None:
+        raise AttributeError(f"{type(self).__name__} is immutable.")
 
     def __repr__(self) -> str:
         return "JPTime" + str(self.to_tuple())
@@ -87,18 +182,22 @@ class JPTime:
         return self.to_tuple() > other.to_tuple()
 
     def __hash__(self) -> int:
-        return hash(self.to_datetime())
+        h = self._hash
+        if h is None:
+            h = hash(self._tuple)
+            object.__setattr__(self, "_hash", h)
+        return h
 
     def to_tuple(self) -> Tuple[int, int, int, int]:
-        return self.era_code, self.jp_year, self.month, self.day
+        return self._tuple
 
     def to_date(self) -> datetime:
-        christian_year = self.jp_year + self.jp_era.begin.year - 1
+        christian_year = self.jp_year + _ERA_START_YEARS[self.era_code - 1] - 1
         return date(christian_year, self.month, self.day)
 
     def to_datetime(self) -> datetime:
-        date_ = self.to_date()
-        return datetime(date_.year, date_.month, date_.day)
+        christian_year = self.jp_year + _ERA_START_YEARS[self.era_code - 1] - 1
+        return datetime(christian_year, self.month, self.day)
 
     @classmethod
     def from_datetime(cls, dt: datetime) -> "JPTime":
@@ -111,14 +210,48 @@ class JPTime:
 
 def from_datetime(dt: datetime) -> "JPTime":
     """datetime -> JPTime"""
-    for era_enum in JPEraEnum:
-        era = era_enum.value
-        if era.begin <= dt <= era.end:
-            jp_year = dt.year - era.begin.year + 1
-            return JPTime(era.code, jp_year, dt.month, dt.day)
-    raise ParseError(f"Cannot convert {dt} to jp format.")
+    jpt = _try_from_ymd(dt.year, dt.month, dt.day)
+    if jpt is None:
+        raise ParseError(f"Cannot convert {dt} to jp format.")
+    return jpt
+
+
+def _try_from_ymd(year: int, month: int, day: int) -> Optional[JPTime]:
+    """christian (year, month, day) -> JPTime, or None if invalid"""
+    key = year * 10000 + month * 100 + day
+    idx = bisect.bisect_right(_ERA_INT_KEYS, key) - 1
+    if idx < 0:
+        return None
+    return _try_jptime(idx + 1, year - _ERA_START_YEARS[idx] + 1, month, day)
 
 
+def from_datetime_array(dt64: "np.ndarray") -> Tuple["np.ndarray", "np.ndarray", "np.ndarray", "np.ndarray"]:
+    """datetime64 array -> (era_codes, jp_years, months, days)
+
+    Vectorized from_datetime for numpy arrays or pandas columns, requires numpy.
+
+    Examples:
+        >>> import numpy as np
+        >>> codes, jp_years, months, days = from_datetime_array(np.array(["1991-03-23", "2019-05-01"], "datetime64[D]"))
+        >>> codes.tolist(), jp_years.tolist(), months.tolist(), days.tolist()
+        ([4, 5], [3, 1], [3, 5], [23, 1])
+    """
+    import numpy as np
+
+    dates = np.asarray(dt64, dtype="datetime64[D]")
+    month_starts = dates.astype("datetime64[M]")
+    years = month_starts.astype("datetime64[Y]").astype(np.int64) + 1970
+    months = month_starts.astype(np.int64) % 12 + 1
+    days = (dates - month_starts).astype(np.int64) + 1
+    keys = years * 10000 + months * 100 + days
+    idx = np.searchsorted(np.array(_ERA_INT_KEYS, dtype=np.int64), keys, side="right") - 1
+    if np.isnat(dates).any() or (idx < 0).any() or (keys > _ERA_END_KEY).any():
+        raise ParseError("Cannot convert NaT or dates out of the eras range to jp format.")
+    jp_years = years - np.array(_ERA_START_YEARS, dtype=np.int64)[idx] + 1
+    return idx + 1, jp_years, months, days
+
+
+@functools.lru_cache(maxsize=4096)
 def from_str(date_str: str) -> "JPTime":
     """str -> JPTime
 
@@ -126,7 +259,9 @@ def from_str(date_str: str) -> "JPTime":
         - japanese era
             - era_symbol/yy/mm/dd (allow kanji number)
             - era_code + yymmdd
-        - christian era (delegate to dateutil.parser)
+        - christian era (yyyy-mm-dd and yyyymmdd, otherwise delegate to dateutil.parser)
+
+    Results are cached by the input string, so repeated inputs return the same JPTime.
 
     Examples:
         >>> from_str("平成３年３月２３日")
@@ -141,51 +276,97 @@ def from_str(date_str: str) -> "JPTime":
         JPTime(4, 3, 3, 23)
 
     """
-    normalized_date = unicodedata.normalize("NFKC", date_str)
-    converters = (_from_japanese_era_with_symbol, _from_japanese_era_with_code, _from_christian_era)
-    for converter in converters:
-        try:
-            return converter(normalized_date)
-        except JPTimeError:
-            continue
-    raise ParseError(f"Cannot parse {normalized_date} to JPTime.")
+    # NFKC is identity on ASCII, so skip it for e.g. "1991-3-23" or "S45.3.23"
+    normalized_date = date_str if _isascii(date_str) else unicodedata.normalize("NFKC", date_str)
+    # only try the converters that can match the shape of the input
+    if normalized_date[:1] in _ERA_FIRST_CHARS:
+        jpt = (
+            _try_from_symbol(normalized_date)
+            or _try_from_code(normalized_date)
+            or _try_from_christian(normalized_date)
+        )
+    elif normalized_date.isdecimal():
+        jpt = _try_from_code(normalized_date) or _try_from_christian(normalized_date)
+    else:
+        jpt = _try_from_christian(normalized_date)
+    if jpt is None:
+        raise ParseError(f"Cannot parse {normalized_date} to JPTime.")
+    return jpt
+
+
+def _kanji_number(n: int) -> str:
+    """1 <= n <= 99 -> kanji number
 
+    Examples:
+        >>> _kanji_number(10)
+        '十'
+        >>> _kanji_number(23)
+        '二十三'
+    """
+    digits = "一二三四五六七八九"
+    tens, ones = divmod(n, 10)
+    return (digits[tens - 1] if tens > 1 else "") + ("十" if tens else "") + (digits[ones - 1] if ones else "")
 
-def _parse_japanese_number(s: str) -> int:
-    try:
-        return int(s)
-    except ValueError:
-        return jnc.ja_to_arabic(s)
 
+# covers every jp_year, month and day in common writing without calling jnc
+_KANJI_NUM = {_kanji_number(n): n for n in range(1, 100)}
 
-def _from_japanese_era_with_symbol(s: str) -> JPTime:
-    """symbol + year/month/day format -> JPTime
-    e.g. 平成元年三月二十三日, 昭和5年3月23日, S22.9.11
-    """
-    s = s.replace("元年", "一年")
-    try:
-        era, rest = JPEraEnum.parse(s)
-        y, m, d = map(_parse_japanese_number, re.findall(r"(\d+|[〇一二三四五六七八九十]+)", rest))
-        return JPTime(era.code, y, m, d)
-    except (TypeError, ValueError):
-        raise ParseError(f"{s} is invalid format.")
 
+def _parse_japanese_number(s: str) -> Optional[int]:
+    if s.isdecimal():
+        return int(s)
+    n = _KANJI_NUM.get(s)
+    if n is not None:
+        return n
+    import jnc
 
-def _from_japanese_era_with_code(s: str) -> JPTime:
-    """gyymmdd format -> JPTime"""
     try:
-        parsed = JPEraEnum.parse(s)
-        if parsed is None:
-            g, yymmdd = divmod(int(s), 1000000)
-        else:
-            g = parsed[0].code
-            yymmdd = int(parsed[1])
-        return JPTime(g, *_yymmdd2ymd(yymmdd))
-    except (ValueError, IndexError):
-        raise ParseError(f"{s} is invalid format.")
-
-
-def _yymmdd2ymd(yymmdd: int) -> Tuple[int, int, int]:
+        return jnc.ja_to_arabic(s)
+    except jnc.BaseJapaneseNumeralsException:
+        return None
+
+
+_SEP_TRANS = str.maketrans({c: " " for c in "年月日./-・, "})
+_NUM_RE = re.compile(r"(\d+|[〇一二三四五六七八九十]+)")
+
+
+def _parse_ymd(
+    parts: List[str], _parse_number: Callable[[str], Optional[int]] = _parse_japanese_number
+) -> Optional[Tuple[int, int, int]]:
+    """[year, month, day] strings -> (year, month, day), or None if invalid"""
+    if len(parts) != 3:
+        return None
+    y, m, d = map(_parse_number, parts)
+    if y is None or m is None or d is None:
+        return None
+    return y, m, d
+
+
+# callables are bound as default arguments so that they are looked up as locals
+def _try_from_symbol(
+    s: str,
+    _parse_era: Callable[[str], Optional[Tuple[JPEra, str]]] = JPEraEnum.parse,
+    _parse_ymd: Callable[[List[str]], Optional[Tuple[int, int, int]]] = _parse_ymd,
+    _findall_number: Callable[[str], List[str]] = _NUM_RE.findall,
+    _try_jptime: Callable[[int, int, int, int], Optional[JPTime]] = _try_jptime,
+) -> Optional[JPTime]:
+    """symbol + year/month/day format -> JPTime, or None if invalid
+    e.g. 平成元年三月二十三日, 昭和5年3月23日, S22.9.11
+    """
+    s = s.replace("元年", "一年")
+    parsed = _parse_era(s)
+    if parsed is None:
+        return None
+    era, rest = parsed
+    # split on the usual delimiters first, and fall back to extracting the numbers
+    # when the input has other delimiters or trailing text (e.g. a weekday)
+    ymd = _parse_ymd(rest.translate(_SEP_TRANS).split()) or _parse_ymd(_findall_number(rest))
+    if ymd is None:
+        return None
+    return _try_jptime(era.code, *ymd)
+
+
+def _yymmdd2ymd(yymmdd: int, _divmod: Callable[[int, int], Tuple[int, int]] = divmod) -> Tuple[int, int, int]:
     """yymmdd -> (year, month, day)
 
     Examples:
@@ -194,19 +375,58 @@ def _yymmdd2ymd(yymmdd: int) -> Tuple[int, int, int]:
         >>> _yymmdd2ymd(320323)
         (32, 3, 23)
     """
-    year, mmdd = divmod(yymmdd, 10000)
-    month, day = divmod(mmdd, 100)
+    year, mmdd = _divmod(yymmdd, 10000)
+    month, day = _divmod(mmdd, 100)
     return year, month, day
 
 
-def _from_christian_era(s: str) -> JPTime:
-    """christian era format -> JPTime
-
-    using dateutil.parser
+def _try_from_code(
+    s: str,
+    _int: Callable[[str], int] = int,
+    _divmod: Callable[[int, int], Tuple[int, int]] = divmod,
+    _parse_era: Callable[[str], Optional[Tuple[JPEra, str]]] = JPEraEnum.parse,
+    _yymmdd2ymd: Callable[[int], Tuple[int, int, int]] = _yymmdd2ymd,
+    _try_jptime: Callable[[int, int, int, int], Optional[JPTime]] = _try_jptime,
+) -> Optional[JPTime]:
+    """gyymmdd format -> JPTime, or None if invalid"""
+    if s.isdecimal():
+        if len(s) == 7:
+            return _try_jptime(_int(s[0]), _int(s[1:3]), _int(s[3:5]), _int(s[5:7]))
+        g, yymmdd = _divmod(_int(s), 1000000)
+        return _try_jptime(g, *_yymmdd2ymd(yymmdd))
+    parsed = _parse_era(s)
+    if parsed is None or not parsed[1].isdecimal():
+        return None
+    return _try_jptime(parsed[0].code, *_yymmdd2ymd(_int(parsed[1])))
+
+
+# common yyyy-mm-dd and yyyymmdd formats, parsed without dateutil
+_CE_RE = re.compile(r"\s*(\d{4})\s*[-/.\s]\s*(\d{1,2})\s*[-/.\s]\s*(\d{1,2})\s*")
+_CE8_RE = re.compile(r"(\d{4})(\d{2})(\d{2})")
+_YMD_TRANS = str.maketrans("年月日", "   ")
+
+
+def _try_from_christian(
+    s: str,
+    _match_ce: Callable[[str], Optional[Match]] = _CE_RE.fullmatch,
+    _match_ce8: Callable[[str], Optional[Match]] = _CE8_RE.fullmatch,
+    _int: Callable[[str], int] = int,
+    _try_from_ymd: Callable[[int, int, int], Optional[JPTime]] = _try_from_ymd,
+) -> Optional[JPTime]:
+    """christian era format -> JPTime, or None if invalid
+
+    yyyy-mm-dd (delimited by -, /, . or spaces) and yyyymmdd are parsed directly,
+    other formats fall back to dateutil.parser
     """
-    s = re.sub(r"[年月日]", " ", s)
+    s = s.translate(_YMD_TRANS)
+    match = _match_ce(s) or _match_ce8(s)
+    if match:
+        year, month, day = map(_int, match.groups())
+        return _try_from_ymd(year, month, day)
+    from dateutil import parser
+
     try:
         dt = parser.parse(s)
-        return from_datetime(dt)
-    except ValueError:
-        raise ParseError(f"Cannot parse {s}.")
+    except (ValueError, OverflowError):
+        return None
+    return _try_from_ymd(dt.year, dt.month, dt.day)
@@ -1,5 +1,8 @@
+import subprocess
+import sys
 from datetime import datetime
 
+import jnc
 import pytest
 
 import jptime
@@ -18,6 +21,11 @@ jp_symbol_cases = [
     ("㍼45年03月23日", jptime.JPTime(3, 45, 3, 23)),
     ("S45年03月23日", jptime.JPTime(3, 45, 3, 23)),
     ("S45.3.23", jptime.JPTime(3, 45, 3, 23)),
+    ("H3,3,23", jptime.JPTime(4, 3, 3, 23)),
+    ("H3・3・23", jptime.JPTime(4, 3, 3, 23)),
+    ("H3.3.23 extra", jptime.JPTime(4, 3, 3, 23)),
+    ("平成3年3月23日(土)", jptime.JPTime(4, 3, 3, 23)),
+    ("平成3年3月23日 午前", jptime.JPTime(4, 3, 3, 23)),
     # kanji cases
     ("平成三年三月二十三日", jptime.JPTime(4, 3, 3, 23)),
     ("平成元年三月二十三日", jptime.JPTime(4, 1, 3, 23)),
@@ -74,6 +82,8 @@ christian_cases = [
     ("1970 3 23", jptime.JPTime(3, 45, 3, 23)),
     ("1970年3月23日", jptime.JPTime(3, 45, 3, 23)),
     ("1970 年3 月23 日", jptime.JPTime(3, 45, 3, 23)),
+    ("19700323", jptime.JPTime(3, 45, 3, 23)),
+    ("March 23 1970", jptime.JPTime(3, 45, 3, 23)),  # fallback to dateutil
 ]
 str_and_jptimes = jp_symbol_cases + jp_code_cases + christian_cases
 
@@ -88,12 +98,28 @@ dt_and_jptimes = [
 
 @pytest.mark.parametrize("s, jpt", jp_symbol_cases)
 def test_from_jp_symbol(s, jpt):
-    assert jptime._from_japanese_era_with_symbol(s) == jpt
+    assert jptime._try_from_symbol(s) == jpt
+
+
+@pytest.mark.parametrize("s", ["昭和45年", "S45", "\u337c45"])
+def test_symbol_pattern(s):
+    assert jptime.JPEraEnum.Showa.value.symbol_pattern.match(s)
+    assert not jptime.JPEraEnum.Heisei.value.symbol_pattern.match(s)
+
+
+@pytest.mark.parametrize("symbol, code", jptime._ERA_PREFIX_MAP.items())
+def test_era_prefix_map(symbol, code):
+    assert jptime.JPEraEnum.code2era(code).symbol_pattern.fullmatch(symbol)
+
+
+def test_kanji_num():
+    assert all(jnc.ja_to_arabic(s) == n for s, n in jptime._KANJI_NUM.items())
+    assert sorted(jptime._KANJI_NUM.values()) == list(range(1, 100))
 
 
 @pytest.mark.parametrize("s, jpt", jp_code_cases)
 def test_from_jp_code(s, jpt):
-    assert jptime._from_japanese_era_with_code(s) == jpt
+    assert jptime._try_from_code(s) == jpt
 
 
 @pytest.mark.parametrize("s, jpt", str_and_jptimes)
@@ -101,11 +127,48 @@ def test_from_str(s, jpt):
     assert jptime.from_str(s) == jpt
 
 
+def test_from_str_cached():
+    assert jptime.from_str("平成３年３月２３日") is jptime.from_str("平成３年３月２３日")
+
+
+@pytest.mark.parametrize("s, expected", [("S45.3.23", True), ("1991-3-23", True), ("", True), ("昭和45年", False)])
+def test_isascii(s, expected):
+    assert jptime._isascii(s) is expected
+
+
+def test_immutable():
+    jpt = jptime.JPTime(4, 3, 3, 23)
+    with pytest.raises(AttributeError):
+        jpt.day = 5
+    with pytest.raises(AttributeError):
+        del jpt.day
+    assert jpt.to_tuple() == (4, 3, 3, 23)
+
+
+def test_hash():
+    assert len({jptime.JPTime(4, 3, 3, 23), jptime.JPTime(4, 3, 3, 23), jptime.JPTime(4, 3, 3, 24)}) == 2
+
+
 @pytest.mark.parametrize("dt, jpt", dt_and_jptimes)
 def test_from_datetime(dt, jpt):
     assert jptime.from_datetime(dt) == jpt
 
 
+def test_from_datetime_array():
+    np = pytest.importorskip("numpy")
+    dts = [dt for dt, _ in dt_and_jptimes] + [datetime(1927, 9, 11, 12), datetime(2019, 4, 30), datetime(2019, 5, 1)]
+    expected = [jpt.to_tuple() for _, jpt in dt_and_jptimes] + [(3, 2, 9, 11), (4, 31, 4, 30), (5, 1, 5, 1)]
+    arrays = jptime.from_datetime_array(np.array(dts, dtype="datetime64[ns]"))
+    assert list(zip(*(a.tolist() for a in arrays))) == expected
+
+
+@pytest.mark.parametrize("dt", [datetime(1868, 1, 24), "NaT", "10000-01-01"])
+def test_from_datetime_array_raises(dt):
+    np = pytest.importorskip("numpy")
+    with pytest.raises(jptime.ParseError):
+        jptime.from_datetime_array(np.array([datetime(1991, 3, 23), dt], dtype="datetime64[D]"))
+
+
 @pytest.mark.parametrize("dt, jpt", dt_and_jptimes)
 def test_to_datetime(dt, jpt):
     assert jpt.to_datetime() == dt
@@ -136,18 +199,51 @@ dates_cannot_parse = jp_symbol_invalid_cases + jp_code_invalid_cases
 
 
 @pytest.mark.parametrize("s", jp_symbol_invalid_cases)
-def test_from_jp_symbol_raises(s):
-    with pytest.raises(jptime.JPTimeError):
-        jptime._from_japanese_era_with_symbol(s)
+def test_from_jp_symbol_invalid(s):
+    assert jptime._try_from_symbol(s) is None
 
 
 @pytest.mark.parametrize("s", jp_code_invalid_cases)
-def test_from_jp_code_raises(s):
-    with pytest.raises(jptime.JPTimeError):
-        jptime._from_japanese_era_with_code(s)
+def test_from_jp_code_invalid(s):
+    assert jptime._try_from_code(s) is None
 
 
 @pytest.mark.parametrize("s", dates_cannot_parse)
 def test_from_str_raises(s):
     with pytest.raises(jptime.ParseError):
         jptime.from_str(s)
+
+
+def test_from_datetime_raises():
+    with pytest.raises(jptime.ParseError):
+        jptime.from_datetime(datetime(1868, 1, 24))  # 1day before Meiji begin
+
+
+def test_from_datetime_ignores_time():
+    assert jptime.from_datetime(datetime(2019, 4, 30, 12)) == jptime.JPTime(4, 31, 4, 30)
+
+
+@pytest.mark.parametrize(
+    "args",
+    [
+        (0, 25, 3, 23),  # era code is out of range
+        (6, 25, 3, 23),  # era code is out of range
+        (4, 31, 5, 1),  # 1day after Heisei end
+        (4, 30, 2, 29),  # day is out of range
+        (4, 30, 13, 1),  # month is out of range
+    ],
+)
+def test_jptime_raises(args):
+    with pytest.raises(jptime.ValidationError):
+        jptime.JPTime(*args)
+
+
+def test_lazy_import():
+    code = "import sys, jptime; assert 'dateutil' not in sys.modules and 'jnc' not in sys.modules"
+    subprocess.run([sys.executable, "-c", code], check=True)
+
+
+def test_try_jptime():
+    jpt = jptime._try_jptime(4, 3, 3, 23)
+    assert jpt == jptime.JPTime(4, 3, 3, 23) and jpt.jp_era is jptime.JPEraEnum.Heisei.value
+    assert jptime._try_jptime(4, 30, 2, 29) is None